@@ -0,0 +1,319 @@
+"""
+H.264 encoding shared by the animation scripts: frames are blitted once per
+scene and handed to PyAV or an ffmpeg subprocess, optionally in parallel.
+"""
+
+import os
+import shutil
+import subprocess
+import functools
+import tempfile
+from fractions import Fraction
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import matplotlib.pyplot as plt
+import matplotlib.animation as animation
+from PIL import Image  # Pillow, installed with matplotlib
+
+try:
+    import av  # PyAV, optional: encodes in-process when installed
+except ImportError:
+    av = None
+
+
+class ScaledPillowWriter(animation.PillowWriter):
+    """
+    Pillow GIF writer that resizes every frame to size (width, height) with
+    Lanczos resampling, the GIF counterpart of ffmpeg's scale filter for
+    figures rasterized below their delivery resolution.
+    """
+    
+    def __init__(self, size, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.size = size
+    
+    def grab_frame(self, **savefig_kwargs):
+        super().grab_frame(**savefig_kwargs)
+        self._frames[-1] = self._frames[-1].resize(self.size, Image.LANCZOS)
+
+
+@functools.lru_cache(maxsize=None)
+def h264_encoder():
+    """
+    Pick the H.264 encoder: NVIDIA's hardware h264_nvenc when ffmpeg has it and
+    a GPU can actually open it, otherwise libx264. The probe encodes a single
+    blank frame, since many ffmpeg builds list nvenc without a usable GPU.
+    """
+    try:
+        encoders = subprocess.run(['ffmpeg', '-hide_banner', '-encoders'],
+                                  capture_output=True, text=True).stdout
+        if 'h264_nvenc' not in encoders:
+            return 'libx264'
+        probe = subprocess.run(['ffmpeg', '-hide_banner', '-loglevel', 'error',
+                                '-f', 'lavfi', '-i', 'color=size=256x256:duration=0.1',
+                                '-frames:v', '1', '-c:v', 'h264_nvenc', '-f', 'null', '-'],
+                               capture_output=True)
+    except FileNotFoundError:
+        return 'libx264'
+    return 'h264_nvenc' if probe.returncode == 0 else 'libx264'
+
+
+@functools.lru_cache(maxsize=None)
+def pyav_h264_encoder():
+    """
+    PyAV counterpart of h264_encoder. PyAV bundles its own libav, which can
+    list h264_nvenc without a GPU to open it, or lack libx264, whatever the
+    ffmpeg on PATH supports; so each encoder is tried by opening it through
+    PyAV itself. Returns None if neither opens.
+    """
+    for codec in ('h264_nvenc', 'libx264'):
+        try:
+            context = av.CodecContext.create(codec, 'w')
+            context.width = context.height = 256
+            context.pix_fmt = 'yuv420p'
+            context.time_base = Fraction(1, 30)
+            context.open()
+        except (av.FFmpegError, ValueError):
+            # ValueError when this libav build does not have the codec at all
+            continue
+        return codec
+    return None
+
+
+def h264_options(codec, fast):
+    """
+    Options for codec. By default the encoder runs its highest quality preset
+    for the final upload; fast=True switches to its quickest one, for
+    iterating on an animation.
+    """
+    if codec == 'h264_nvenc':
+        if fast:
+            return {'preset': 'p4', 'rc': 'vbr', 'cq': '23'}
+        return {'preset': 'p7', 'tune': 'hq', 'rc': 'vbr', 'cq': '19'}
+    if fast:
+        return {'preset': 'ultrafast', 'crf': '23'}
+    return {'preset': 'veryslow', 'crf': '18'}
+
+
+def render_frames(fig, init, update, frame_numbers):
+    """
+    Yield the canvas's RGBA buffer for each of frame_numbers. Only the artists returned by
+    init and update are redrawn, over a cached background of everything else,
+    the same split FuncAnimation's blitting makes on screen.
+    """
+    # Render the static background once without the animated artists
+    animated = init()
+    for artist in animated:
+        artist.set_animated(True)
+    try:
+        fig.canvas.draw()
+        background = fig.canvas.copy_from_bbox(fig.bbox)
+        for frame in frame_numbers:
+            fig.canvas.restore_region(background)
+            for artist in sorted(update(frame), key=lambda a: a.get_zorder()):
+                fig.draw_artist(artist)
+            yield fig.canvas.buffer_rgba()
+    finally:
+        for artist in animated:
+            artist.set_animated(False)
+
+
+def encode_with_pyav(fig, init, update, frame_numbers, fps, output_file,
+                     fast=False, metadata=None):
+    """
+    Encode the rendered frames in-process with PyAV's libav bindings, handing
+    each RGBA buffer to the encoder without a subprocess or pipe. Returns
+    False, before any frame is rendered, if libav cannot open the encoder;
+    errors once frames are being encoded propagate.
+    """
+    width, height = fig.canvas.get_width_height(physical=True)
+    codec = pyav_h264_encoder()
+    
+    with av.open(output_file, 'w') as container:
+        container.metadata.update(metadata or {})
+        stream = container.add_stream(codec, rate=fps, options=h264_options(codec, fast))
+        stream.width = width
+        stream.height = height
+        stream.pix_fmt = 'yuv420p'
+        # Open the encoder before any frame is rendered, so a failure to open
+        # it leaves the scene untouched for another encoder
+        try:
+            container.start_encoding()
+        except av.FFmpegError as error:
+            print(f"PyAV could not open {codec} ({error}), trying ffmpeg...")
+            return False
+        for buffer in render_frames(fig, init, update, frame_numbers):
+            frame = av.VideoFrame.from_ndarray(np.asarray(buffer), format='rgba')
+            container.mux(stream.encode(frame))
+        # Flush the frames the encoder is still holding
+        container.mux(stream.encode())
+    return True
+
+
+def pipe_frames_to_ffmpeg(fig, init, update, frame_numbers, fps, output_file,
+                          fast=False, metadata=None):
+    """
+    Stream the rendered frames' raw RGBA buffers into an ffmpeg subprocess,
+    skipping the per-frame bookkeeping of Animation.save. Raises
+    FileNotFoundError if ffmpeg is not installed and RuntimeError if it fails
+    to encode.
+    """
+    width, height = fig.canvas.get_width_height(physical=True)
+    codec = h264_encoder()
+    options = h264_options(codec, fast)
+    
+    cmd = ['ffmpeg', '-y', '-loglevel', 'error',
+           '-f', 'rawvideo', '-pix_fmt', 'rgba', '-s', f'{width}x{height}',
+           '-r', str(fps), '-i', '-',
+           '-c:v', codec, '-pix_fmt', 'yuv420p']
+    for key, value in options.items():
+        cmd += [f'-{key}', value]
+    for key, value in (metadata or {}).items():
+        cmd += ['-metadata', f'{key}={value}']
+    cmd.append(output_file)
+    
+    # A 1 MB pipe buffer lets ffmpeg read whole frames without stalling the draw loop
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, bufsize=1 << 20)
+    try:
+        for buffer in render_frames(fig, init, update, frame_numbers):
+            proc.stdin.write(buffer)
+        proc.stdin.close()
+    except BrokenPipeError:
+        # ffmpeg exited early; its return code is checked below
+        pass
+    except BaseException:
+        proc.kill()
+        proc.wait()
+        raise
+    
+    if proc.wait() != 0:
+        raise RuntimeError(f"ffmpeg exited with status {proc.returncode}")
+
+
+def encode_video(fig, init, update, frame_numbers, fps, output_file,
+                 fast=False, metadata=None):
+    """
+    Encode the frames in this process, with PyAV when it is installed and its
+    libav can open an H.264 encoder, and through the ffmpeg pipe otherwise.
+    The pipe also takes over if libav fails to open the encoder, which happens
+    before any frame is rendered; a libav error in the middle of the encode is
+    raised instead, since the scene may carry state the frames already drawn
+    have advanced. Raises FileNotFoundError or RuntimeError like
+    pipe_frames_to_ffmpeg when the pipe cannot encode either.
+    """
+    if av is not None and pyav_h264_encoder() is not None:
+        if encode_with_pyav(fig, init, update, frame_numbers, fps, output_file,
+                            fast=fast, metadata=metadata):
+            return
+    pipe_frames_to_ffmpeg(fig, init, update, frame_numbers, fps, output_file,
+                          fast=fast, metadata=metadata)
+
+
+def replay_frames(init, update, start):
+    """
+    Warm-up for scenes that carry state from frame to frame: run init and the
+    updates of frames [0, start) without drawing, so a worker can begin
+    partway through the animation.
+    """
+    init()
+    for frame in range(start):
+        update(frame)
+
+
+def render_segment(build_scene, start, stop, segment_file, fast=False, warm_up=None):
+    """
+    Worker for encode_in_parallel: build the scene in this process and encode
+    frames [start, stop) on their own into segment_file. warm_up, if given, is
+    called as warm_up(init, update, start) before the first frame is drawn.
+    """
+    fig, init, update, frames, fps = build_scene()
+    try:
+        if warm_up is not None:
+            warm_up(init, update, start)
+        encode_video(fig, init, update, range(start, stop), fps,
+                     segment_file, fast=fast)
+    finally:
+        plt.close(fig)
+    return segment_file
+
+
+def encode_in_parallel(build_scene, frames, fps, output_file, workers,
+                       fast=False, metadata=None, warm_up=None):
+    """
+    Split the frames into one contiguous chunk per worker process, render and
+    encode each chunk to its own segment, then join the segments with ffmpeg's
+    concat demuxer without re-encoding. Each worker starts partway through the
+    animation, so update must depend only on the frame number unless warm_up
+    (see render_segment) brings the scene up to the worker's first frame.
+    Segments are encoded like encode_video; without the ffmpeg binary to join
+    them, the frames are encoded in this process instead.
+    """
+    if shutil.which('ffmpeg') is None:
+        print("ffmpeg not found to join the segments, encoding in a single process...")
+        fig, init, update, frames, fps = build_scene()
+        try:
+            encode_video(fig, init, update, range(frames), fps, output_file,
+                         fast=fast, metadata=metadata)
+        finally:
+            plt.close(fig)
+        return
+    
+    bounds = np.linspace(0, frames, workers + 1).astype(int)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        jobs = [(start, stop, os.path.join(tmp_dir, f'segment_{i:03d}.mp4'))
+                for i, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:]))
+                if stop > start]
+        with ProcessPoolExecutor(max_workers=len(jobs)) as executor:
+            futures = [executor.submit(render_segment, build_scene, start, stop,
+                                       segment_file, fast, warm_up)
+                       for start, stop, segment_file in jobs]
+            segment_files = [future.result() for future in futures]
+        
+        list_file = os.path.join(tmp_dir, 'segments.txt')
+        with open(list_file, 'w') as f:
+            f.writelines(f"file '{segment_file}'\n" for segment_file in segment_files)
+        
+        cmd = ['ffmpeg', '-y', '-loglevel', 'error',
+               '-f', 'concat', '-safe', '0', '-i', list_file, '-c', 'copy']
+        for key, value in (metadata or {}).items():
+            cmd += ['-metadata', f'{key}={value}']
+        cmd.append(output_file)
+        if subprocess.run(cmd).returncode != 0:
+            raise RuntimeError("ffmpeg failed to join the rendered segments")
+
+
+def render_gif_segment(build_scene, start, stop, warm_up=None):
+    """
+    Worker for save_gif: build the scene in this process, warm it up as in
+    render_segment and return frames [start, stop) as palette images.
+    """
+    fig, init, update, frames, fps = build_scene()
+    try:
+        if warm_up is not None:
+            warm_up(init, update, start)
+        # Palette quantization is the slow part of writing a GIF, so it is
+        # done here in the worker rather than when the file is assembled
+        return [Image.fromarray(np.asarray(buffer)).convert('RGB').quantize()
+                for buffer in render_frames(fig, init, update, range(start, stop))]
+    finally:
+        plt.close(fig)
+
+
+def save_gif(build_scene, frames, fps, gif_file, workers=1, warm_up=None):
+    """
+    GIF counterpart of the MP4 encoders for when ffmpeg is unavailable:
+    workers render and quantize contiguous chunks of frames, and the main
+    process writes them into one looping GIF in order. With a single worker
+    the frames are rendered in this process, through the same blitting path.
+    """
+    if workers == 1:
+        images = render_gif_segment(build_scene, 0, frames, warm_up)
+    else:
+        bounds = np.linspace(0, frames, workers + 1).astype(int)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(render_gif_segment, build_scene, start, stop, warm_up)
+                       for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+            images = [image for future in futures for image in future.result()]
+    images[0].save(gif_file, save_all=True, append_images=images[1:],
+                   duration=1000/fps, loop=0)
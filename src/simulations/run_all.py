@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+"""
+Render the circle-trace and triangle animations in parallel.
+
+Each animation is independent and spends most of its time drawing frames and
+encoding them in ffmpeg, so running them in separate processes keeps every
+core busy.
+
+Usage:
+    python -m src.simulations.run_all [--output OUTPUT] [--workers N]
+"""
+
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from src.simulations.sine_circle_trace import create_sine_circle_trace_animation
+from src.simulations.sine_cosine_circle_trace import create_sine_cosine_circle_animation
+from src.simulations.triangle_angle_challenge import create_triangle_angle_challenge
+from src.simulations.trig_functions_circle_trace import create_trig_functions_animation
+
+ANIMATIONS = [
+    create_sine_circle_trace_animation,
+    create_sine_cosine_circle_animation,
+    create_triangle_angle_challenge,
+    create_trig_functions_animation,
+]
+
+def main():
+    parser = argparse.ArgumentParser(description='Render all trace animations in parallel')
+    parser.add_argument('--output', type=str, default='output', help='Output directory for animations')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='Number of worker processes (default: number of CPUs)')
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(create, args.output) for create in ANIMATIONS]
+        for create, future in zip(ANIMATIONS, futures):
+            # Re-raise any worker failure with the animation that caused it
+            try:
+                future.result()
+            except Exception as e:
+                print(f"{create.__name__} failed: {e}")
+                raise
+
+    print("\nAll animations have been generated in the", args.output, "directory.")
+
+if __name__ == '__main__':
+    main()
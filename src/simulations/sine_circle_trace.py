@@ -3,10 +3,10 @@ import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 from matplotlib.patches import Circle
 import os
-from matplotlib import rcParams
+import math
 
-# Set high DPI value for better quality
-rcParams['figure.dpi'] = 150
+from src.simulations.encoding import ScaledPillowWriter
+from src.simulations.static_text import bake_static_text
 
 def create_sine_circle_trace_animation(output_dir="output"):
     """
@@ -22,7 +22,9 @@ def create_sine_circle_trace_animation(output_dir="output"):
     frames = fps * duration
     
     # Set up figure (9:16 aspect ratio for TikTok)
-    fig = plt.figure(figsize=(6, 10.67), facecolor='black')
+    # Rasterize at 100 DPI (600x1067) and upscale to 900x1600 on encode;
+    # Agg's draw cost scales with pixel count, lanczos scaling is nearly free
+    fig = plt.figure(figsize=(6, 10.67), dpi=100, facecolor='black')
     ax = fig.add_subplot(111)
     
     # Configure axes - reduce negative x-axis range and set positive limit to 4π
@@ -41,10 +43,11 @@ def create_sine_circle_trace_animation(output_dir="output"):
     ax.axvline(x=0, color='gray', linestyle='-', alpha=0.5, lw=1)
     
     # X-axis markings (π, 2π, 3π, 4π)
+    tick_labels = []
     for i, label in enumerate(['π', '2π', '3π', '4π']):
         x = (i + 1) * np.pi
         ax.plot([x, x], [-0.1, 0.1], 'gray', lw=1)
-        ax.text(x, -0.9, label, color='white', ha='center', fontsize=12)
+        tick_labels.append(ax.text(x, -0.9, label, color='white', ha='center', fontsize=12))
     
     # Create point on circle
     point_on_circle, = ax.plot([], [], 'o', color='#00FFFF', ms=10)
@@ -73,10 +76,20 @@ def create_sine_circle_trace_animation(output_dir="output"):
                        fontsize=14, color='#FF00FF', ha='center', alpha=0.9,
                        style='italic', weight='bold')
     
-    # Create data arrays
-    t_points = np.linspace(0, 0, 1000)
+    # None of the text changes, so rasterize it once into a single overlay
+    bake_static_text(fig, [*tick_labels, title, watermark])
+    
+    # Precompute the full wave once; update only reveals the part up to t
+    t_points = np.linspace(0, 4*np.pi, 1000)
     sine_points = np.sin(t_points)
     
+    # The point advances by a constant angle each frame, so its position can be
+    # stepped with one complex multiply instead of a cos/sin pair
+    d_theta = 4 * math.pi / frames
+    rotation = complex(math.cos(d_theta), math.sin(d_theta))
+    phasor = 1 + 0j
+    phasor_frame = 0
+    
     def init():
         """Initialize animation"""
         point_on_circle.set_data([], [])
@@ -85,15 +98,25 @@ def create_sine_circle_trace_animation(output_dir="output"):
         connecting_line.set_data([], [])
         point_on_sine.set_data([], [])
         return (point_on_circle, horizontal_line, sine_wave, 
-                connecting_line, point_on_sine, title, watermark)
+                connecting_line, point_on_sine)
     
     def update(frame):
         """Update animation for each frame"""
-        t = 4 * np.pi * frame / frames
+        nonlocal phasor, phasor_frame
+        t = d_theta * frame
         
         # Calculate position on circle
-        x = -1 + np.cos(t)  # -1 is the x-center of circle
-        y = np.sin(t)
+        if frame == phasor_frame + 1:
+            phasor *= rotation
+            # Renormalize now and then so rounding error can't drift the radius
+            if frame % 64 == 0:
+                phasor /= abs(phasor)
+        elif frame != phasor_frame:
+            # Frames arrived out of order (e.g. a restart); resync exactly
+            phasor = complex(math.cos(t), math.sin(t))
+        phasor_frame = frame
+        x = -1 + phasor.real  # -1 is the x-center of circle
+        y = phasor.imag
         
         # Update point on circle
         point_on_circle.set_data([x], [y])
@@ -105,17 +128,14 @@ def create_sine_circle_trace_animation(output_dir="output"):
         connecting_line.set_data([0, t], [y, y])
         
         # Update sine wave
-        max_t = max(4 * np.pi, t)
-        t_points = np.linspace(0, max_t, 1000)
         mask = t_points <= t
-        sine_points = np.sin(t_points)
         sine_wave.set_data(t_points[mask], sine_points[mask])
         
         # Update point on sine wave
         point_on_sine.set_data([t], [y])
         
         return (point_on_circle, horizontal_line, sine_wave, 
-                connecting_line, point_on_sine, title, watermark)
+                connecting_line, point_on_sine)
     
     # Create animation
     ani = animation.FuncAnimation(
@@ -135,13 +155,14 @@ def create_sine_circle_trace_animation(output_dir="output"):
     try:
         writer = animation.FFMpegWriter(fps=fps, metadata=dict(artist='Me'),
                                       bitrate=1800, codec="h264",
-                                      extra_args=['-pix_fmt', 'yuv420p'])
+                                      extra_args=['-vf', 'scale=900:1600:flags=lanczos',
+                                                  '-pix_fmt', 'yuv420p'])
         ani.save(output_file, writer=writer)
         print(f"Sine circle trace animation saved to '{output_file}'")
     except (RuntimeError, FileNotFoundError) as e:
         print("ffmpeg not found. Saving as GIF instead...")
         gif_file = os.path.join(output_dir, 'sine_circle_trace.gif')
-        ani.save(gif_file, writer='pillow', fps=fps)
+        ani.save(gif_file, writer=ScaledPillowWriter((900, 1600), fps=fps))
         print(f"Sine circle trace animation saved as GIF to '{gif_file}'")
         
         file_size_bytes = os.path.getsize(gif_file)
@@ -3,10 +3,10 @@ import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 from matplotlib.patches import Circle
 import os
-from matplotlib import rcParams
+import math
 
-# Set high DPI value for better quality
-rcParams['figure.dpi'] = 150
+from src.simulations.encoding import ScaledPillowWriter
+from src.simulations.static_text import bake_static_text
 
 def create_sine_cosine_circle_animation(output_dir="output"):
     """
@@ -21,7 +21,9 @@ def create_sine_cosine_circle_animation(output_dir="output"):
     frames = fps * duration
     
     # Set up figure (9:16 aspect ratio for TikTok)
-    fig = plt.figure(figsize=(6, 10.67), facecolor='black')
+    # Rasterize at 100 DPI (600x1067) and upscale to 900x1600 on encode;
+    # Agg's draw cost scales with pixel count, lanczos scaling is nearly free
+    fig = plt.figure(figsize=(6, 10.67), dpi=100, facecolor='black')
     ax = fig.add_subplot(111)
     
     # Configure axes
@@ -40,10 +42,11 @@ def create_sine_cosine_circle_animation(output_dir="output"):
     ax.axvline(x=0, color='gray', linestyle='-', alpha=0.4, lw=1)
     
     # X-axis markings (π, 2π, 3π, 4π)
+    tick_labels = []
     for i, label in enumerate(['π', '2π', '3π', '4π']):
         x = (i + 1) * np.pi
         ax.plot([x, x], [-0.1, 0.1], 'gray', lw=1)
-        ax.text(x, -0.5, label, color='white', ha='center', fontsize=10)
+        tick_labels.append(ax.text(x, -0.5, label, color='white', ha='center', fontsize=10))
     
     # Create point on circle
     point_on_circle, = ax.plot([], [], 'o', color='white', ms=10)
@@ -71,10 +74,11 @@ def create_sine_cosine_circle_animation(output_dir="output"):
                            weight='bold', ha='center')
     
     # Add title - more eye-catching with glow effect
+    glows = []
     for offset in [(0.03, 0.03), (-0.03, -0.03), (0.03, -0.03), (-0.03, 0.03)]:
-        glow = ax.text(2*np.pi+offset[0], 4.8+offset[1], "SIN & COS", 
-                       fontsize=28, color='#333333', ha='center', 
-                       weight='bold', alpha=0.3)
+        glows.append(ax.text(2*np.pi+offset[0], 4.8+offset[1], "SIN & COS", 
+                             fontsize=28, color='#333333', ha='center', 
+                             weight='bold', alpha=0.3))
     
     title = ax.text(2*np.pi, 4.8, "SIN & COS", 
                     fontsize=28, color='white', ha='center', 
@@ -96,11 +100,32 @@ def create_sine_cosine_circle_animation(output_dir="output"):
                        fontsize=14, color='#FF00FF', ha='center', alpha=0.9,
                        style='italic', weight='bold')
     
-    # Create data arrays
-    t_points = np.linspace(0, 0, 1000)
+    # None of the text changes, so rasterize it once into a single overlay
+    bake_static_text(fig, [*tick_labels, *glows, title, subtitle, sine_label, cosine_label,
+                           eq_sine, eq_cosine, watermark])
+    
+    # Precompute the full waves once; update only reveals the part up to t
+    t_points = np.linspace(0, 4*np.pi, 1000)
     sine_points = np.sin(t_points)
     cosine_points = np.cos(t_points)
     
+    # The point advances by a constant angle each frame, so its position can be
+    # stepped with one complex multiply instead of a cos/sin pair
+    d_theta = 4 * math.pi / frames
+    rotation = complex(math.cos(d_theta), math.sin(d_theta))
+    phasor = 1 + 0j
+    phasor_frame = 0
+    
+    # Endpoint buffers for the short segments, filled in place each frame
+    # instead of building fresh lists. The zero entries never change, and the
+    # one-element slices double as the data for the single-point markers.
+    seg_x = np.zeros(2)     # [x, 0]
+    seg_y = np.empty(2)     # [y, y]
+    vert_x = np.empty(2)    # [x, x]
+    vert_y = np.zeros(2)    # [y, 0]
+    conn_x = np.zeros(2)    # [0, t]
+    cos_y = np.empty(2)     # [cos(t), cos(t)]
+    
     def init():
         """Initialize animation"""
         point_on_circle.set_data([], [])
@@ -114,47 +139,58 @@ def create_sine_cosine_circle_animation(output_dir="output"):
         point_on_cosine.set_data([], [])
         return (point_on_circle, horizontal_line, vertical_line, 
                 sine_connecting_line, cosine_connecting_line,
-                sine_wave, cosine_wave, point_on_sine, point_on_cosine,
-                title, subtitle, sine_label, cosine_label, eq_sine, eq_cosine, watermark)
+                sine_wave, cosine_wave, point_on_sine, point_on_cosine)
     
     def update(frame):
         """Update animation for each frame"""
-        t = 4 * np.pi * frame / frames
+        nonlocal phasor, phasor_frame
+        t = d_theta * frame
         
         # Calculate position on circle
-        x = -1 + np.cos(t)  # -1 is the x-center of circle
-        y = np.sin(t)
+        if frame == phasor_frame + 1:
+            phasor *= rotation
+            # Renormalize now and then so rounding error can't drift the radius
+            if frame % 64 == 0:
+                phasor /= abs(phasor)
+        elif frame != phasor_frame:
+            # Frames arrived out of order (e.g. a restart); resync exactly
+            phasor = complex(math.cos(t), math.sin(t))
+        phasor_frame = frame
+        x = -1 + phasor.real  # -1 is the x-center of circle
+        y = phasor.imag
+        
+        seg_x[0] = x
+        seg_y[:] = y
+        vert_x[:] = x
+        vert_y[0] = y
+        conn_x[1] = t
+        cos_y[:] = x + 1
         
         # Update point on circle
-        point_on_circle.set_data([x], [y])
+        point_on_circle.set_data(seg_x[:1], seg_y[:1])
         
         # Update horizontal line (for sine wave projection)
-        horizontal_line.set_data([x, 0], [y, y])
+        horizontal_line.set_data(seg_x, seg_y)
         
         # Update vertical line (for cosine wave projection)
-        vertical_line.set_data([x, x], [y, 0])
+        vertical_line.set_data(vert_x, vert_y)
         
         # Update connecting lines to right side
-        sine_connecting_line.set_data([0, t], [y, y])    # Sine uses y-coordinate
-        cosine_connecting_line.set_data([0, t], [x+1, x+1])  # Cosine uses x-coordinate (shifted)
+        sine_connecting_line.set_data(conn_x, seg_y)    # Sine uses y-coordinate
+        cosine_connecting_line.set_data(conn_x, cos_y)  # Cosine uses x-coordinate (shifted)
         
         # Update sine and cosine waves
-        max_t = max(4 * np.pi, t)
-        t_points = np.linspace(0, max_t, 1000)
         mask = t_points <= t
-        sine_points = np.sin(t_points)
-        cosine_points = np.cos(t_points)
         sine_wave.set_data(t_points[mask], sine_points[mask])
         cosine_wave.set_data(t_points[mask], cosine_points[mask])
         
         # Update points on waves
-        point_on_sine.set_data([t], [y])             # y = sin(t)
-        point_on_cosine.set_data([t], [x+1])         # x+1 = cos(t)
+        point_on_sine.set_data(conn_x[1:], seg_y[:1])     # y = sin(t)
+        point_on_cosine.set_data(conn_x[1:], cos_y[:1])   # x+1 = cos(t)
         
         return (point_on_circle, horizontal_line, vertical_line, 
                 sine_connecting_line, cosine_connecting_line,
-                sine_wave, cosine_wave, point_on_sine, point_on_cosine,
-                title, subtitle, sine_label, cosine_label, eq_sine, eq_cosine, watermark)
+                sine_wave, cosine_wave, point_on_sine, point_on_cosine)
     
     # Create animation
     ani = animation.FuncAnimation(
@@ -174,13 +210,14 @@ def create_sine_cosine_circle_animation(output_dir="output"):
     try:
         writer = animation.FFMpegWriter(fps=fps, metadata=dict(artist='Me'),
                                       bitrate=1800, codec="h264",
-                                      extra_args=['-pix_fmt', 'yuv420p'])
+                                      extra_args=['-vf', 'scale=900:1600:flags=lanczos',
+                                                  '-pix_fmt', 'yuv420p'])
         ani.save(output_file, writer=writer)
         print(f"Sine cosine animation saved to '{output_file}'")
     except (RuntimeError, FileNotFoundError) as e:
         print("ffmpeg not found. Saving as GIF instead...")
         gif_file = os.path.join(output_dir, 'sine_cosine_circle.gif')
-        ani.save(gif_file, writer='pillow', fps=fps)
+        ani.save(gif_file, writer=ScaledPillowWriter((900, 1600), fps=fps))
         print(f"Sine cosine animation saved as GIF to '{gif_file}'")
         
         file_size_bytes = os.path.getsize(gif_file)
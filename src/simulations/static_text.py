@@ -0,0 +1,75 @@
+"""
+Static text baking shared by the trace animations: text that never changes is
+rasterized once into RGBA tiles and composited onto the canvas each frame.
+"""
+
+import numpy as np
+from matplotlib.artist import Artist
+
+
+class StaticTextOverlay(Artist):
+    """Pre-rendered RGBA tiles of static text, composited straight onto the canvas"""
+    
+    def __init__(self, tiles):
+        super().__init__()
+        self.tiles = tiles
+        self.set_zorder(10)
+    
+    def draw(self, renderer):
+        if not self.get_visible():
+            return
+        gc = renderer.new_gc()
+        for x0, y0, tile in self.tiles:
+            renderer.draw_image(gc, x0, y0, tile)
+        gc.restore()
+        self.stale = False
+
+def bake_static_text(fig, texts):
+    """
+    Render static text artists once and replace them with RGBA tiles cropped to
+    their extents. Saving redraws the whole figure every frame, and blitting a
+    few small tiles is cheaper than laying out each text again.
+    """
+    hidden = [fig.patch]
+    for ax in fig.axes:
+        hidden.extend(child for child in ax.get_children()
+                      if child.get_visible() and child not in texts)
+    for artist in hidden:
+        artist.set_visible(False)
+    
+    fig.canvas.draw()
+    renderer = fig.canvas.get_renderer()
+    buffer = np.asarray(fig.canvas.buffer_rgba())
+    height, width = buffer.shape[:2]
+    
+    # Pixel boxes (x0, y0, x1, y1) around each text, merged where they overlap
+    # so that no pixel is composited twice
+    boxes = []
+    for text in texts:
+        bbox = text.get_window_extent(renderer)
+        box = [max(int(bbox.x0) - 2, 0), max(int(bbox.y0) - 2, 0),
+               min(int(np.ceil(bbox.x1)) + 2, width), min(int(np.ceil(bbox.y1)) + 2, height)]
+        merged = True
+        while merged:
+            merged = False
+            for other in boxes:
+                if (box[0] < other[2] and other[0] < box[2] and
+                        box[1] < other[3] and other[1] < box[3]):
+                    boxes.remove(other)
+                    box = [min(box[0], other[0]), min(box[1], other[1]),
+                           max(box[2], other[2]), max(box[3], other[3])]
+                    merged = True
+                    break
+        boxes.append(box)
+    
+    # The buffer's first row is the top of the figure, while draw_image
+    # expects rows bottom-up
+    tiles = [(x0, y0, buffer[height - y1:height - y0, x0:x1][::-1].copy())
+             for x0, y0, x1, y1 in boxes]
+    
+    for artist in hidden:
+        artist.set_visible(True)
+    for text in texts:
+        text.remove()
+    
+    return fig.add_artist(StaticTextOverlay(tiles))
@@ -144,35 +144,63 @@ def create_triangle_angle_challenge(output_dir="output"):
         # Initialize function for animation
         return (triangle, *angle_arcs, *angle_labels, *point_markers)
     
+    # Angle geometry for the current problem, refreshed when the problem changes
+    angle_info = setup_angles(problems[0]['points'])
+    
     def update(frame):
-        nonlocal problem_idx
+        nonlocal problem_idx, angle_info
         
-        # Change problem every 5 seconds
+        # Change problem every 5 seconds. Everything that depends only on the
+        # problem is set here; the other frames just sweep arcs and reveal.
         if frame % (fps * 5) == 0:
             problem_idx = (frame // (fps * 5)) % len(problems)
+            problem = problems[problem_idx]
+            vertices = problem['points']
+            known_angles = problem['known_angles']
+            
+            # Setup angle information
+            angle_info = setup_angles(vertices)
+            
+            # Update triangle
+            triangle.set_xy(vertices)
+            
+            # Update instruction
+            instruction.set_text(problem['text'])
+            
+            # Update points
+            for point, vertex in zip(point_markers, vertices):
+                point.set_center(vertex)
+            
+            for i in range(3):
+                center = angle_info[i]['center']
+                angle = angle_info[i]['angle']
+                
+                # Set angle label
+                label = angle_labels[i]
+                label.set_position(problem['label_positions'][i])
+                
+                # Check if this is a right angle
+                is_right = abs(angle - 90) < 0.5
+                if is_right:
+                    right_angle_markers[i].set_visible(True)
+                    right_angle_markers[i].set_xy(center)
+                else:
+                    right_angle_markers[i].set_visible(False)
+                
+                # Set angle label text
+                if known_angles[i] is not None:
+                    label.set_text(f"{known_angles[i]}°")
+                else:
+                    label.set_text("x")
             
         # Get current problem
         problem = problems[problem_idx]
-        vertices = problem['points']
         known_angles = problem['known_angles']
         
-        # Setup angle information
-        angle_info = setup_angles(vertices)
-        
-        # Update triangle
-        triangle.set_xy(vertices)
-        
-        # Update instruction
-        instruction.set_text(problem['text'])
-        
-        # Update points
-        for i, (point, vertex) in enumerate(zip(point_markers, vertices)):
-            point.set_center(vertex)
-        
         # Create animation effect - reveal solution gradually
         progress = (frame % (fps * 5)) / (fps * 5)
         
-        # Update angle arcs and labels
+        # Update angle arcs
         for i in range(3):
             # Set arc parameters
             center = angle_info[i]['center']
@@ -194,25 +222,8 @@ def create_triangle_angle_challenge(output_dir="output"):
             ax.add_patch(new_arc)
             angle_arcs[i] = new_arc
             
-            # Set angle label
-            label_pos = problem['label_positions'][i]
-            label = angle_labels[i]
-            label.set_position(label_pos)
-            
-            # Check if this is a right angle
-            is_right = abs(angle - 90) < 0.5
-            if is_right:
-                right_angle_markers[i].set_visible(True)
-                right_angle_markers[i].set_xy(center)
-            else:
-                right_angle_markers[i].set_visible(False)
-            
-            # Set angle label text
-            if known_angles[i] is not None:
-                label.set_text(f"{known_angles[i]}°")
-            else:
-                label.set_text("x")
-                # On last second of the problem, reveal the answer
+            # On last second of the problem, reveal the answer
+            if known_angles[i] is None:
                 if progress > 0.8:
                     solution_text.set_text(f"x = {problem['x_value']}°")
                 else:
@@ -3,26 +3,28 @@ import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 from matplotlib.patches import Arc, Circle
 import os
-from matplotlib import rcParams
+import argparse
+import math
 
-# Set high DPI value for better quality
-rcParams['figure.dpi'] = 150
+from src.simulations.encoding import encode_in_parallel, encode_video
 
-def create_trig_challenge_animation(output_dir="output"):
+
+def build_trig_challenge_scene():
     """
-    Creates an engaging trigonometry challenge animation optimized for TikTok.
-    The animation shows a rotating triangle with dynamic measurements and asks
-    viewers to solve for a missing value.
+    Build the rotating-triangle figure and the init/update callbacks that draw
+    each frame. Returns (fig, init, update, frames, fps).
     """
-    print("Creating Trigonometry Challenge Animation...")
-    
     # Animation parameters
     fps = 30
     duration = 30  # 30 seconds total
     frames = fps * duration
     
     # Set up figure (9:16 aspect ratio for TikTok)
-    fig = plt.figure(figsize=(6, 10.67), facecolor='black')
+    # Render at 150 DPI, capped so frames are no wider than the 1080 px delivery
+    # width: Agg's cost grows with pixel count, and fonts and line widths are in
+    # points, so the layout is the same at any DPI
+    figsize = (6, 10.67)
+    fig = plt.figure(figsize=figsize, dpi=min(150, 1080 / figsize[0]), facecolor='black')
     ax = fig.add_subplot(111)
     
     # Configure axes
@@ -79,22 +81,46 @@ def create_trig_challenge_animation(output_dir="output"):
     watermark = ax.text(0, -7, "@ScienceInMotion", 
                        fontsize=14, color='#FF00FF', ha='center', alpha=0.7)
     
-    def rotate_point(point, angle, center=np.array([0, 0])):
-        """Rotate a point around a center by given angle in radians"""
-        cos_a = np.cos(angle)
-        sin_a = np.sin(angle)
-        px, py = point - center
-        rx = px * cos_a - py * sin_a
-        ry = px * sin_a + py * cos_a
-        return np.array([rx, ry]) + center
-    
     def get_angle(p1, p2, p3):
         """Calculate angle between three points in degrees"""
-        v1 = p1 - p2
-        v2 = p3 - p2
-        cos_angle = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2))
-        angle = np.arccos(np.clip(cos_angle, -1.0, 1.0))
-        return np.degrees(angle)
+        vx, vy = p1[0] - p2[0], p1[1] - p2[1]
+        wx, wy = p3[0] - p2[0], p3[1] - p2[1]
+        # atan2 of |cross| and dot needs no normalization or clamping and stays
+        # accurate for angles near 0 and 180 degrees, unlike acos
+        return math.degrees(math.atan2(abs(vx*wy - vy*wx), vx*wx + vy*wy))
+    
+    # The triangle is rigid and turns at a constant rate, so the rotated
+    # vertices for every frame are computed up front in one vectorized pass
+    rotation_angles = np.linspace(0, 2*np.pi, frames, endpoint=False)
+    cos_r = np.cos(rotation_angles)
+    sin_r = np.sin(rotation_angles)
+    rotations = np.array([[cos_r, -sin_r], [sin_r, cos_r]]).transpose(2, 0, 1)
+    vertex_table = np.einsum('fij,vj->fvi', rotations, np.stack([A, B, C]))
+    
+    # Side label anchors (midpoints of BC, AC and AB) for every frame
+    midpoint_table = (vertex_table[:, [1, 0, 0]] + vertex_table[:, [2, 2, 1]]) / 2
+    
+    # Side lengths and interior angles don't change under rotation, so the
+    # labels and arc spans are set once; update only moves them
+    side_a_len = np.linalg.norm(B - C)
+    side_b_len = np.linalg.norm(A - C)
+    angle_A_val = get_angle(B, A, C)
+    angle_B_val = get_angle(A, B, C)
+    angle_C_val = get_angle(A, C, B)
+    
+    side_a.set_text(f"{side_a_len:.1f}")
+    side_b.set_text(f"{side_b_len:.1f}")
+    angle_label_A.set_text(f"{angle_A_val:.0f}°")
+    angle_label_B.set_text(f"{angle_B_val:.0f}°")
+    angle_label_C.set_text(f"{angle_C_val:.0f}°")
+    
+    for angle_patch, angle_val, offset in [
+        (angle_A, angle_A_val, 180),
+        (angle_B, angle_B_val, -60),
+        (angle_C, angle_C_val, 60)
+    ]:
+        angle_patch.theta1 = offset - angle_val/2
+        angle_patch.theta2 = offset + angle_val/2
     
     def init():
         """Initialize animation"""
@@ -107,14 +133,8 @@ def create_trig_challenge_animation(output_dir="output"):
         """Update animation for each frame"""
         frame_norm = frame / frames  # Normalized frame (0 to 1)
         
-        # Rotation angle for the entire triangle
-        rotation = frame_norm * 2 * np.pi
-        
-        # Calculate current triangle points with rotation
-        center = np.array([0, 0])
-        current_A = rotate_point(A, rotation)
-        current_B = rotate_point(B, rotation)
-        current_C = rotate_point(C, rotation)
+        # Current triangle points from the precomputed rotation table
+        current_A, current_B, current_C = vertex_table[frame]
         
         # Update triangle
         triangle.set_data([current_A[0], current_B[0], current_C[0], current_A[0]],
@@ -125,75 +145,54 @@ def create_trig_challenge_animation(output_dir="output"):
         point_B.center = current_B
         point_C.center = current_C
         
-        # Calculate and update angles
-        angle_A_val = get_angle(current_B, current_A, current_C)
-        angle_B_val = get_angle(current_A, current_B, current_C)
-        angle_C_val = get_angle(current_A, current_C, current_B)
-        
-        # Update angle arcs
-        for point, angle_patch, angle_val, offset in [
-            (current_A, angle_A, angle_A_val, 180),
-            (current_B, angle_B, angle_B_val, -60),
-            (current_C, angle_C, angle_C_val, 60)
-        ]:
-            angle_patch.center = point
-            angle_patch.theta1 = offset - angle_val/2
-            angle_patch.theta2 = offset + angle_val/2
+        # Move angle arcs
+        angle_A.center = current_A
+        angle_B.center = current_B
+        angle_C.center = current_C
         
-        # Calculate side lengths
-        side_a_len = np.linalg.norm(current_B - current_C)
-        side_b_len = np.linalg.norm(current_A - current_C)
-        side_c_len = np.linalg.norm(current_A - current_B)
-        
-        # Text fade-in based on animation phase
-        if frame_norm < 0.1:  # Initial fade in
-            alpha = frame_norm / 0.1
-            title.set_alpha(alpha)
-            watermark.set_alpha(alpha * 0.7)
-        elif 0.2 < frame_norm < 0.3:  # Fade in measurements
-            alpha = (frame_norm - 0.2) / 0.1
-            subtitle.set_alpha(alpha)
-        elif frame_norm > 0.9:  # Fade out
-            alpha = (1 - (frame_norm - 0.9) / 0.1)
-            title.set_alpha(alpha)
-            subtitle.set_alpha(alpha)
-            watermark.set_alpha(alpha * 0.7)
-        
-        # Update angle labels with rounded values
-        angle_label_A.set_text(f"{angle_A_val:.0f}°")
-        angle_label_B.set_text(f"{angle_B_val:.0f}°")
-        angle_label_C.set_text(f"{angle_C_val:.0f}°")
+        # Text fades based on animation phase, computed from the frame alone so
+        # frames can be rendered in any order. Skip set_alpha when the value
+        # is unchanged so settled texts aren't marked stale for nothing.
+        fade_out = min(1, (1 - frame_norm) / 0.1)                    # Fade out after 90%
+        title_alpha = min(frame_norm / 0.1, fade_out)                # Initial fade in
+        subtitle_alpha = min(max(0, (frame_norm - 0.2) / 0.1), fade_out)  # Fade in at 20-30%
+        if title_alpha != title.get_alpha():
+            title.set_alpha(title_alpha)
+            watermark.set_alpha(title_alpha * 0.7)
+        if subtitle_alpha != subtitle.get_alpha():
+            subtitle.set_alpha(subtitle_alpha)
         
         # Position labels
-        for label, point in [
-            (angle_label_A, current_A),
-            (angle_label_B, current_B),
-            (angle_label_C, current_C)
-        ]:
-            label.set_position((point[0], point[1]))
-        
-        # Update side labels
-        side_a.set_text(f"{side_a_len:.1f}")
-        side_b.set_text(f"{side_b_len:.1f}")
+        angle_label_A.set_position(current_A)
+        angle_label_B.set_position(current_B)
+        angle_label_C.set_position(current_C)
         
         # Position side labels at midpoints
-        side_a.set_position(((current_B[0] + current_C[0])/2, (current_B[1] + current_C[1])/2))
-        side_b.set_position(((current_A[0] + current_C[0])/2, (current_A[1] + current_C[1])/2))
-        side_c.set_position(((current_A[0] + current_B[0])/2, (current_A[1] + current_B[1])/2))
+        mid_a, mid_b, mid_c = midpoint_table[frame]
+        side_a.set_position(mid_a)
+        side_b.set_position(mid_b)
+        side_c.set_position(mid_c)
         
         return (triangle, point_A, point_B, point_C, angle_A, angle_B, angle_C,
                 title, subtitle, side_a, side_b, side_c, angle_label_A, 
                 angle_label_B, angle_label_C, watermark)
     
-    # Create animation
-    ani = animation.FuncAnimation(
-        fig,
-        update,
-        frames=frames,
-        init_func=init,
-        blit=True,
-        interval=1000/fps
-    )
+    return fig, init, update, frames, fps
+
+
+def create_trig_challenge_animation(output_dir="output", fast=False, workers=1):
+    """
+    Creates an engaging trigonometry challenge animation optimized for TikTok.
+    The animation shows a rotating triangle with dynamic measurements and asks
+    viewers to solve for a missing value.
+    
+    fast=True encodes with the encoder's quickest preset instead of its highest
+    quality one. With workers > 1 the frames are rendered in that many
+    processes and the encoded segments joined afterwards.
+    """
+    print("Creating Trigonometry Challenge Animation...")
+    
+    fig, init, update, frames, fps = build_trig_challenge_scene()
     
     # Save animation
     os.makedirs(output_dir, exist_ok=True)
@@ -201,13 +200,25 @@ def create_trig_challenge_animation(output_dir="output"):
     print(f"Saving animation to {output_file}...")
     
     try:
-        writer = animation.FFMpegWriter(fps=fps, metadata=dict(artist='Me'),
-                                      bitrate=1800, codec="h264",
-                                      extra_args=['-pix_fmt', 'yuv420p'])
-        ani.save(output_file, writer=writer)
+        if workers > 1:
+            encode_in_parallel(build_trig_challenge_scene, frames, fps, output_file, workers,
+                               fast=fast, metadata=dict(artist='Me'))
+        else:
+            encode_video(fig, init, update, range(frames), fps, output_file,
+                         fast=fast, metadata=dict(artist='Me'))
         print(f"Trigonometry challenge animation saved to '{output_file}'")
     except (RuntimeError, FileNotFoundError) as e:
         print("ffmpeg not found. Saving as GIF instead...")
+        # Only build the FuncAnimation here: blitting marks the returned
+        # artists as animated, which would hide them from a plain canvas.draw
+        ani = animation.FuncAnimation(
+            fig,
+            update,
+            frames=frames,
+            init_func=init,
+            blit=True,
+            interval=1000/fps
+        )
         gif_file = os.path.join(output_dir, 'trig_challenge.gif')
         ani.save(gif_file, writer='pillow', fps=fps)
         print(f"Trigonometry challenge animation saved as GIF to '{gif_file}'")
@@ -218,5 +229,14 @@ def create_trig_challenge_animation(output_dir="output"):
     
     plt.close(fig)
 
+def main():
+    parser = argparse.ArgumentParser(description='Render the trigonometry challenge animation')
+    parser.add_argument('--output', type=str, default='output', help='Output directory for the animation')
+    parser.add_argument('--workers', type=int, default=1, help='Number of rendering processes')
+    parser.add_argument('--fast', action='store_true', help="Use the encoder's quickest preset for a draft render")
+    args = parser.parse_args()
+    
+    create_trig_challenge_animation(args.output, fast=args.fast, workers=args.workers)
+
 if __name__ == "__main__":
-    create_trig_challenge_animation() 
\ No newline at end of file
+    main() 
\ No newline at end of file
@@ -2,26 +2,31 @@ import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 from matplotlib.patches import Circle
+from matplotlib.collections import LineCollection
 import os
-from matplotlib import rcParams
+import argparse
+import math
 
-# Set high DPI value for better quality
-rcParams['figure.dpi'] = 150
+from src.simulations.encoding import encode_in_parallel, encode_video
+from src.simulations.static_text import bake_static_text
 
-def create_trig_functions_animation(output_dir="output"):
+
+def build_trig_functions_scene():
     """
-    Creates an animation showing how sine, cosine, and tangent waves are generated from circular motion.
-    The animation shows a point moving around a circle and traces all three waves in separate subplots.
+    Build the three-panel figure and the init/update callbacks that draw each
+    frame. Returns (fig, init, update, frames, fps).
     """
-    print("Creating Trigonometric Functions Animation...")
-    
     # Animation parameters
     fps = 60
     duration = 15  # 15 seconds total
     frames = fps * duration
     
     # Set up figure with 3 vertically stacked subplots (16:9 aspect ratio)
-    fig = plt.figure(figsize=(12, 20), facecolor='black')
+    # Render at 150 DPI, capped so frames are no wider than the 1080 px delivery
+    # width: Agg's cost grows with pixel count, and fonts and line widths are in
+    # points, so the layout is the same at any DPI
+    figsize = (12, 20)
+    fig = plt.figure(figsize=figsize, dpi=min(150, 1080 / figsize[0]), facecolor='black')
     
     # Create gridspec for custom layout
     gs = fig.add_gridspec(4, 1, height_ratios=[1, 1, 1, 0.2])
@@ -67,36 +72,36 @@ def create_trig_functions_animation(output_dir="output"):
         ax.axvline(x=0, color='gray', linestyle='-', alpha=0.4, lw=1)
     
     # X-axis markings (π, 2π, 3π, 4π) for each subplot
+    tick_labels = []
     for ax in [ax_sine, ax_cosine, ax_tangent]:
         for i, label in enumerate(['π', '2π', '3π', '4π']):
             x = (i + 1) * np.pi
             ax.plot([x, x], [-0.1, 0.1], 'gray', lw=1)
-            ax.text(x, -0.3, label, color='white', ha='center', fontsize=10)
-    
-    # Create points on circles
-    point_on_circle_sine, = ax_sine.plot([], [], 'o', color='white', ms=10)
-    point_on_circle_cosine, = ax_cosine.plot([], [], 'o', color='white', ms=10)
-    point_on_circle_tangent, = ax_tangent.plot([], [], 'o', color='white', ms=10)
+            tick_labels.append(ax.text(x, -0.3, label, color='white', ha='center', fontsize=10))
     
-    # Create projection lines
+    # Create projection lines, one dashed LineCollection per subplot so each
+    # panel's projections are drawn in a single call, and one scatter per
+    # subplot for the point on the circle (white) and the point on the wave
     # Sine
-    sine_projection, = ax_sine.plot([], [], '--', color='#00AAFF', alpha=0.6, lw=1.5)
-    sine_connecting_line, = ax_sine.plot([], [], '--', color='#00AAFF', alpha=0.6, lw=1.5)
+    sine_projections = ax_sine.add_collection(LineCollection(
+        [], colors='#00AAFF', linestyles='--', linewidths=1.5, alpha=0.6))
     sine_wave, = ax_sine.plot([], [], '-', color='#00AAFF', lw=3)
-    point_on_sine, = ax_sine.plot([], [], 'o', color='#00AAFF', ms=10)
+    sine_markers = ax_sine.scatter(np.zeros(2), np.zeros(2), s=100, c=['white', '#00AAFF'],
+                                   linewidths=1, zorder=5)
     
     # Cosine
-    cosine_projection, = ax_cosine.plot([], [], '--', color='#FF9500', alpha=0.6, lw=1.5)
-    cosine_connecting_line, = ax_cosine.plot([], [], '--', color='#FF9500', alpha=0.6, lw=1.5)
+    cosine_projections = ax_cosine.add_collection(LineCollection(
+        [], colors='#FF9500', linestyles='--', linewidths=1.5, alpha=0.6))
     cosine_wave, = ax_cosine.plot([], [], '-', color='#FF9500', lw=3)
-    point_on_cosine, = ax_cosine.plot([], [], 'o', color='#FF9500', ms=10)
+    cosine_markers = ax_cosine.scatter(np.zeros(2), np.zeros(2), s=100, c=['white', '#FF9500'],
+                                       linewidths=1, zorder=5)
     
     # Tangent
-    tangent_projection1, = ax_tangent.plot([], [], '--', color='#FF00FF', alpha=0.6, lw=1.5)
-    tangent_projection2, = ax_tangent.plot([], [], '--', color='#FF00FF', alpha=0.6, lw=1.5)
-    tangent_connecting_line, = ax_tangent.plot([], [], '--', color='#FF00FF', alpha=0.6, lw=1.5)
+    tangent_projections = ax_tangent.add_collection(LineCollection(
+        [], colors='#FF00FF', linestyles='--', linewidths=1.5, alpha=0.6))
     tangent_wave, = ax_tangent.plot([], [], '-', color='#FF00FF', lw=3)
-    point_on_tangent, = ax_tangent.plot([], [], 'o', color='#FF00FF', ms=10)
+    tangent_markers = ax_tangent.scatter(np.zeros(2), np.zeros(2), s=100, c=['white', '#FF00FF'],
+                                         linewidths=1, zorder=5)
     
     # Create tangent line on the circle
     tangent_line, = ax_tangent.plot([], [], '-', color='#FF00FF', lw=1.5, alpha=0.7)
@@ -131,125 +136,148 @@ def create_trig_functions_animation(output_dir="output"):
                            fontsize=14, color='#00FFFF', ha='center', alpha=0.9,
                            style='italic', weight='bold')
     
-    # Create data arrays
-    t_points = np.linspace(0, 0, 1000)
+    # None of the text changes, so rasterize it once into a single overlay
+    bake_static_text(fig, [*tick_labels, sine_label, cosine_label, tangent_label,
+                           eq_sine, eq_cosine, eq_tangent, title, subtitle, watermark])
+    
+    # Precompute the full waves once on a fine grid; update only reveals the part
+    # up to t, and since t_points is sorted that part is a prefix (a view, no copy)
+    t_points = np.linspace(0, 4*np.pi, 4000)
     sine_points = np.sin(t_points)
     cosine_points = np.cos(t_points)
     tangent_points = np.tan(t_points)
     
-    # To avoid plotting tangent at discontinuities
-    tangent_mask = np.abs(tangent_points) < 10
+    # Break the tangent curve at its discontinuities; matplotlib splits lines at NaN
+    tangent_points[np.abs(tangent_points) >= 10] = np.nan
+    
+    # Angle, position on the circle (-1 is the x-center) and tangent value for
+    # every frame, computed as whole arrays instead of per-frame scalar calls
+    frame_angles = 4 * np.pi * np.arange(frames) / frames
+    circle_x = -1 + np.cos(frame_angles)
+    circle_y = np.sin(frame_angles)
+    tangent_values = np.tan(frame_angles)
+    
+    # Length of the revealed prefix for every frame, found in one vectorized search
+    reveal_counts = np.searchsorted(t_points, frame_angles, side='right')
+    
+    # Segment buffers (segment, endpoint, xy) for the projection collections,
+    # filled in place each frame. The constant endpoints are written once.
+    sine_segments = np.zeros((2, 2, 2))     # (x, y)-(0, y), (0, y)-(t, y)
+    cosine_segments = np.zeros((2, 2, 2))   # (x, y)-(x, 0), (0, cos)-(t, cos)
+    tangent_segments = np.zeros((3, 2, 2))  # (x, y)-(-1, 0), (-1, 0)-(tangent_x, 0),
+                                            # (0, tan)-(t, tan)
+    tangent_segments[0, 1, 0] = -1
+    tangent_segments[1, 0, 0] = -1
+    tline_x = np.empty(2)
+    tline_y = np.empty(2)
+    
+    # Marker offsets per panel: the point on the circle, then the point on the
+    # wave, which sits at the far end of that panel's connecting line
+    sine_offsets = np.zeros((2, 2))
+    cosine_offsets = np.zeros((2, 2))
+    tangent_offsets = np.zeros((2, 2))
     
     def init():
         """Initialize animation"""
         # Initialize all plot elements
-        point_on_circle_sine.set_data([], [])
-        point_on_circle_cosine.set_data([], [])
-        point_on_circle_tangent.set_data([], [])
-        
-        sine_projection.set_data([], [])
-        sine_connecting_line.set_data([], [])
+        sine_projections.set_segments([])
         sine_wave.set_data([], [])
-        point_on_sine.set_data([], [])
+        sine_markers.set_offsets(np.empty((0, 2)))
         
-        cosine_projection.set_data([], [])
-        cosine_connecting_line.set_data([], [])
+        cosine_projections.set_segments([])
         cosine_wave.set_data([], [])
-        point_on_cosine.set_data([], [])
+        cosine_markers.set_offsets(np.empty((0, 2)))
         
-        tangent_projection1.set_data([], [])
-        tangent_projection2.set_data([], [])
-        tangent_connecting_line.set_data([], [])
+        tangent_projections.set_segments([])
         tangent_wave.set_data([], [])
-        point_on_tangent.set_data([], [])
+        tangent_markers.set_offsets(np.empty((0, 2)))
         tangent_line.set_data([], [])
         
-        return (point_on_circle_sine, sine_projection, sine_connecting_line, sine_wave, point_on_sine,
-                point_on_circle_cosine, cosine_projection, cosine_connecting_line, cosine_wave, point_on_cosine,
-                point_on_circle_tangent, tangent_projection1, tangent_projection2, tangent_connecting_line, 
-                tangent_wave, point_on_tangent, tangent_line)
+        return (sine_projections, sine_wave, sine_markers,
+                cosine_projections, cosine_wave, cosine_markers,
+                tangent_projections, tangent_wave, tangent_markers, tangent_line)
     
     def update(frame):
         """Update animation for each frame"""
-        t = 4 * np.pi * frame / frames
-        
-        # Calculate position on circle
-        x = -1 + np.cos(t)  # -1 is the x-center of circle
-        y = np.sin(t)
-        
-        # Calculate tangent value and tangent line
-        tangent_val = np.tan(t)
+        t = frame_angles[frame]
+        x, y, tangent_val = circle_x[frame], circle_y[frame], tangent_values[frame]
         
         # Limit tangent value for display (prevent extreme values)
-        display_tangent = np.clip(tangent_val, -3, 3)
-        
-        # Update points on circles
-        point_on_circle_sine.set_data([x], [y])
-        point_on_circle_cosine.set_data([x], [y])
-        point_on_circle_tangent.set_data([x], [y])
+        display_tangent = max(-3.0, min(3.0, tangent_val))
         
-        # Update SINE projection and wave
-        sine_projection.set_data([x, 0], [y, y])
-        sine_connecting_line.set_data([0, t], [y, y])
+        # Update SINE projection and connecting line
+        sine_segments[0, 0] = x, y
+        sine_segments[0, 1, 1] = y
+        sine_segments[1, :, 1] = y
+        sine_segments[1, 1, 0] = t
+        sine_projections.set_segments(sine_segments)
         
-        # Update COSINE projection and wave
-        cosine_projection.set_data([x, x], [y, 0])
-        cosine_connecting_line.set_data([0, t], [x+1, x+1])
+        # Update COSINE projection and connecting line
+        cosine_segments[0, 0] = x, y
+        cosine_segments[0, 1, 0] = x
+        cosine_segments[1, :, 1] = x + 1
+        cosine_segments[1, 1, 0] = t
+        cosine_projections.set_segments(cosine_segments)
         
         # Create tangent line on the circle (tangent to the point)
         radius = 1
         # Tangent line extends from the point on circle
         if abs(tangent_val) < 100:  # Avoid extreme cases
             tangent_length = 0.5
-            tangent_dx = tangent_length / np.sqrt(1 + tangent_val**2)
+            tangent_dx = tangent_length / math.sqrt(1 + tangent_val**2)
             tangent_dy = tangent_val * tangent_dx
-            tangent_line.set_data([x - tangent_dx, x + tangent_dx], [y - tangent_dy, y + tangent_dy])
+            tline_x[0], tline_x[1] = x - tangent_dx, x + tangent_dx
+            tline_y[0], tline_y[1] = y - tangent_dy, y + tangent_dy
+            tangent_line.set_data(tline_x, tline_y)
         else:
             tangent_line.set_data([], [])
         
         # Update TANGENT projection and wave
         # Tangent point is where a line from origin meets the tangent line to the circle
-        tangent_x = -1 + radius / np.cos(t) if abs(np.cos(t)) > 0.01 else -1 + 100*radius
-        tangent_projection1.set_data([x, -1], [y, 0])  # Line from point to origin
-        tangent_projection2.set_data([-1, tangent_x], [0, 0])  # Line from origin along x axis
-        tangent_connecting_line.set_data([0, t], [display_tangent, display_tangent])
+        tangent_x = -1 + radius / (x + 1) if abs(x + 1) > 0.01 else -1 + 100*radius
+        tangent_segments[0, 0] = x, y               # Line from point to origin
+        tangent_segments[1, 1, 0] = tangent_x       # Line from origin along x axis
+        tangent_segments[2, :, 1] = display_tangent
+        tangent_segments[2, 1, 0] = t
+        tangent_projections.set_segments(tangent_segments)
         
         # Update waves
-        max_t = max(4 * np.pi, t)
-        t_points = np.linspace(0, max_t, 1000)
-        mask = t_points <= t
+        idx = reveal_counts[frame]
         
-        sine_points = np.sin(t_points)
-        cosine_points = np.cos(t_points)
-        tangent_points = np.tan(t_points)
+        sine_wave.set_data(t_points[:idx], sine_points[:idx])
+        cosine_wave.set_data(t_points[:idx], cosine_points[:idx])
+        tangent_wave.set_data(t_points[:idx], tangent_points[:idx])
         
-        # Mask out tangent discontinuities
-        tangent_mask = np.abs(tangent_points) < 10
-        masked_tangent = np.ma.masked_array(tangent_points, ~tangent_mask)
+        # Update points on circles and waves
+        sine_offsets[0] = x, y
+        sine_offsets[1] = sine_segments[1, 1]           # y = sin(t)
+        cosine_offsets[0] = x, y
+        cosine_offsets[1] = cosine_segments[1, 1]       # y = cos(t)
+        tangent_offsets[0] = x, y
+        tangent_offsets[1] = tangent_segments[2, 1]     # y = tan(t) (clipped)
+        sine_markers.set_offsets(sine_offsets)
+        cosine_markers.set_offsets(cosine_offsets)
+        tangent_markers.set_offsets(tangent_offsets)
         
-        sine_wave.set_data(t_points[mask], sine_points[mask])
-        cosine_wave.set_data(t_points[mask], cosine_points[mask])
-        tangent_wave.set_data(t_points[mask & tangent_mask], masked_tangent[mask & tangent_mask])
-        
-        # Update points on waves
-        point_on_sine.set_data([t], [y])           # y = sin(t)
-        point_on_cosine.set_data([t], [x+1])       # y = cos(t)
-        point_on_tangent.set_data([t], [display_tangent])  # y = tan(t) (clipped)
-        
-        return (point_on_circle_sine, sine_projection, sine_connecting_line, sine_wave, point_on_sine,
-                point_on_circle_cosine, cosine_projection, cosine_connecting_line, cosine_wave, point_on_cosine,
-                point_on_circle_tangent, tangent_projection1, tangent_projection2, tangent_connecting_line, 
-                tangent_wave, point_on_tangent, tangent_line)
-    
-    # Create animation
-    ani = animation.FuncAnimation(
-        fig,
-        update,
-        frames=frames,
-        init_func=init,
-        blit=True,
-        interval=1000/fps
-    )
+        return (sine_projections, sine_wave, sine_markers,
+                cosine_projections, cosine_wave, cosine_markers,
+                tangent_projections, tangent_wave, tangent_markers, tangent_line)
+    
+    return fig, init, update, frames, fps
+
+
+def create_trig_functions_animation(output_dir="output", fast=False, workers=1):
+    """
+    Creates an animation showing how sine, cosine, and tangent waves are generated from circular motion.
+    The animation shows a point moving around a circle and traces all three waves in separate subplots.
+    
+    fast=True encodes with the encoder's quickest preset instead of its highest
+    quality one. With workers > 1 the frames are rendered in that many
+    processes and the encoded segments joined afterwards.
+    """
+    print("Creating Trigonometric Functions Animation...")
+    
+    fig, init, update, frames, fps = build_trig_functions_scene()
     
     # Save animation
     os.makedirs(output_dir, exist_ok=True)
@@ -257,13 +285,25 @@ def create_trig_functions_animation(output_dir="output"):
     print(f"Saving animation to {output_file}...")
     
     try:
-        writer = animation.FFMpegWriter(fps=fps, metadata=dict(artist='Science_In_Motion'),
-                                      bitrate=2400, codec="h264",
-                                      extra_args=['-pix_fmt', 'yuv420p'])
-        ani.save(output_file, writer=writer)
+        if workers > 1:
+            encode_in_parallel(build_trig_functions_scene, frames, fps, output_file, workers,
+                               fast=fast, metadata=dict(artist='Science_In_Motion'))
+        else:
+            encode_video(fig, init, update, range(frames), fps, output_file,
+                         fast=fast, metadata=dict(artist='Science_In_Motion'))
         print(f"Trig functions animation saved to '{output_file}'")
     except (RuntimeError, FileNotFoundError) as e:
         print("ffmpeg not found. Saving as GIF instead...")
+        # Only build the FuncAnimation here: blitting marks the returned
+        # artists as animated, which would hide them from a plain canvas.draw
+        ani = animation.FuncAnimation(
+            fig,
+            update,
+            frames=frames,
+            init_func=init,
+            blit=True,
+            interval=1000/fps
+        )
         gif_file = os.path.join(output_dir, 'trig_functions_circle.gif')
         ani.save(gif_file, writer='pillow', fps=fps)
         print(f"Trig functions animation saved as GIF to '{gif_file}'")
@@ -274,5 +314,14 @@ def create_trig_functions_animation(output_dir="output"):
     
     plt.close(fig)
 
+def main():
+    parser = argparse.ArgumentParser(description='Render the trigonometric functions animation')
+    parser.add_argument('--output', type=str, default='output', help='Output directory for the animation')
+    parser.add_argument('--workers', type=int, default=1, help='Number of rendering processes')
+    parser.add_argument('--fast', action='store_true', help="Use the encoder's quickest preset for a draft render")
+    args = parser.parse_args()
+    
+    create_trig_functions_animation(args.output, fast=args.fast, workers=args.workers)
+
 if __name__ == "__main__":
-    create_trig_functions_animation() 
\ No newline at end of file
+    main() 
\ No newline at end of file